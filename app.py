@@ -1,90 +1,414 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template
+from flask.json.provider import JSONProvider
 from datetime import date
-import json, uuid, os
-from copy import deepcopy
+from functools import lru_cache, wraps
+import atexit, json, mmap, os, tempfile, threading, time
+
+# Prefer orjson (a native-code JSON codec, ~3x faster parsing and up to
+# ~10x faster serializing than the stdlib) when it is available, with
+# msgspec's JSON codec as a second native option.  The stdlib json
+# module remains as a final fallback so the app still runs in
+# environments where neither can be installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec.json as _msgspec_json
+except ImportError:
+    _msgspec_json = None
 
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(APP_ROOT, "data")
 DATA_FILE = os.path.join(DATA_DIR, "finance_data.json")
+# Sidecar journal holding one JSON mutation record per line.  Mutations
+# append here instead of rewriting the whole data file; the journal is
+# replayed over the snapshot on startup and folded back into it once it
+# grows past _JOURNAL_COMPACT_EVERY entries (or at interpreter exit).
+JOURNAL_FILE = os.path.join(DATA_DIR, "finance_data.jsonl")
+_JOURNAL_COMPACT_EVERY = 500
+
+
+def _json_loads(buf):
+    """Parse JSON bytes with the fastest available codec."""
+    if orjson is not None:
+        return orjson.loads(buf)
+    if _msgspec_json is not None:
+        return _msgspec_json.decode(buf)
+    return json.loads(buf)
+
+def _json_dumps(data, indent=True):
+    """Serialize ``data`` to JSON bytes with the fastest available codec."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if _msgspec_json is not None:
+        buf = _msgspec_json.encode(data)
+        return _msgspec_json.format(buf, indent=2) if indent else buf
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def _new_id():
+    """
+    Opaque 32-char hex id.  IDs are only ever compared as strings, so this
+    skips the UUID object construction and dash formatting of
+    ``str(uuid.uuid4())`` while keeping the same 128 bits of randomness.
+    Existing dashed UUIDs in the data file keep working unchanged.
+    """
+    return os.urandom(16).hex()
+
+def _make_default():
+    """
+    Build a fresh default dataset: the starting categories plus empty
+    lists for transactions, debts and goals.  Constructing a new dict
+    (with new UUIDs) on every call is cheaper than deep-copying a shared
+    constant and removes any risk of resets aliasing each other.  Used
+    both for first-run seeding and for /api/reset_data.
+    """
+    return {
+        "categories": [
+            {"id": _new_id(), "name": "Salary", "type": "income", "deleted": False},
+            # {"id": _new_id(), "name": "Rent", "type": "expense", "deleted": False},
+            {"id": _new_id(), "name": "Groceries", "type": "expense", "deleted": False},
+            # {"id": _new_id(), "name": "Transport", "type": "expense", "deleted": False},
+            {"id": _new_id(), "name": "Investments", "type": "saving", "deleted": False}
+        ],
+        "transactions": [],
+        "debts": [],
+        "goals": [],
+        # An optional starting balance to carry over from before using
+        # the app.  Users can update this value via the API.
+        "open_balance": 0.0
+    }
+
+class _FastJSONProvider(JSONProvider):
+    """
+    JSON provider backed by the fast codec helpers above so every
+    ``jsonify(...)`` response and ``request.get_json()`` parse goes
+    through native code instead of the stdlib's pure-Python encoder.
+    Only installed when a native codec is present.
+    """
+    def dumps(self, obj, **kwargs):
+        return _json_dumps(obj, indent=False).decode("utf-8")
 
-# A default data structure used when resetting the dataset.  This defines
-# the initial categories and empty lists for transactions, debts and
-# goals.  Note: we deliberately do not include the 'id' values from
-# existing data as new UUIDs will be generated when the app first
-# starts.  The categories provided here must match those created in
-# _load_data() on first run.
-DEFAULT_DATA = {
-    "categories": [
-        {"id": str(uuid.uuid4()), "name": "Salary", "type": "income", "deleted": False},
-        {"id": str(uuid.uuid4()), "name": "Groceries", "type": "expense", "deleted": False},
-        {"id": str(uuid.uuid4()), "name": "Investments", "type": "saving", "deleted": False}
-    ],
-    "transactions": [],
-    "debts": [],
-    "goals": [],
-    "open_balance": 0.0
-}
+    def loads(self, s, **kwargs):
+        return _json_loads(s)
 
 app = Flask(__name__)
+if orjson is not None or _msgspec_json is not None:
+    app.json = _FastJSONProvider(app)
 
 # ---------------------- Data helpers ----------------------
+# Parsed-data cache keyed on the data file's mtime.  Re-reading and
+# re-parsing the whole JSON file on every request is wasteful when the
+# file rarely changes between reads; a cache hit costs one stat() call.
+_CACHE = {"mtime": None, "data": None}
+_CACHE_LOCK = threading.Lock()
+# Serializes every mutating endpoint's load→mutate→journal section so two
+# concurrent writes can't interleave on the shared in-memory dataset and
+# silently drop each other's changes.  RLock so a handler can call
+# helpers that re-enter it; read-only endpoints never take this lock.
+_WRITE_LOCK = threading.RLock()
+
+def _locked(fn):
+    """Run a mutating endpoint under the process-wide write lock."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _WRITE_LOCK:
+            return fn(*args, **kwargs)
+    return wrapper
+
+# Number of journal entries appended since the last full snapshot write.
+_journal_len = 0
+# Monotonic version of the in-memory dataset, bumped whenever it changes
+# (journal append, snapshot write, or reload from disk).  Used to key the
+# serialized /api/data response cache and the /api/data ETag.  Seeded
+# from the boot time so versions (and therefore ETags) from a previous
+# process never collide with this one's — a counter restarting at 0
+# would let clients match stale If-None-Match values into false 304s.
+_data_version = time.time_ns()
+
+def _bump_version():
+    global _data_version
+    _data_version += 1
+
+_COLLECTIONS = ("categories", "transactions", "debts", "goals")
+# Valid values for a debt's kind field.
+_DEBT_KINDS = frozenset(("payable", "receivable"))
+
+def _to_maps(data):
+    """
+    Convert the on-disk record lists into id-keyed dicts in memory so
+    lookups and deletes are O(1) instead of list scans/rebuilds.  Insertion
+    order is preserved, and ``_public`` turns the dicts back into lists
+    whenever the data is serialized.
+    """
+    for coll in _COLLECTIONS:
+        recs = data.get(coll) or []
+        if not isinstance(recs, dict):
+            data[coll] = {r["id"]: r for r in recs}
+
+def _group_txns_by_cat(txns):
+    """Group transaction records into lists keyed by category_id."""
+    by_cat = {}
+    for t in txns:
+        by_cat.setdefault(t.get("category_id"), []).append(t)
+    return by_cat
+
+def _build_indexes(data):
+    """
+    Attach O(1) lookup tables to ``data`` under the ephemeral ``_idx`` key
+    so hot paths avoid linear scans.  ``cat`` and ``txn`` are aliases of
+    the id-keyed collections themselves (see ``_to_maps``); debts/goals
+    get extra maps keyed by their linked category id.  The tables hold
+    references to the same record dicts, so in-place edits stay visible
+    everywhere.  ``_idx`` is never serialized (see ``_public``).
+    """
+    data["_idx"] = {
+        "cat": data["categories"],
+        "debt_by_cat": {d["linked_category_id"]: d for d in data["debts"].values() if d.get("linked_category_id")},
+        "goal_by_cat": {g["linked_category_id"]: g for g in data["goals"].values() if g.get("linked_category_id")},
+        "txn": data["transactions"],
+        "txn_by_cat": _group_txns_by_cat(data["transactions"].values()),
+        # Casefolded-name -> id maps for duplicate checks, so validators do
+        # one dict probe instead of re-casefolding every name per request.
+        # cat_names only tracks active (not deleted) categories.
+        "cat_names": {(c.get("name") or "").strip().casefold(): c["id"]
+                      for c in data["categories"].values() if not c.get("deleted")},
+        "debt_names": {(d.get("name") or "").strip().casefold(): d["id"] for d in data["debts"].values()},
+        "goal_names": {(g.get("name") or "").strip().casefold(): g["id"] for g in data["goals"].values()},
+    }
+
+def _public(data):
+    """
+    A view of ``data`` without the ephemeral underscore-prefixed keys and
+    with the id-keyed collections materialized back into plain lists, i.e.
+    the shape stored on disk and served by /api/data.
+    """
+    out = {}
+    for k, v in data.items():
+        if k.startswith("_"):
+            continue
+        out[k] = list(v.values()) if k in _COLLECTIONS and isinstance(v, dict) else v
+    return out
+
 def _load_data():
     """
     Load the JSON finance data file.  If the file does not exist, create a
     default dataset with some starting categories and zeroed lists.  The
     returned dict will always contain an ``open_balance`` field so the
-    application can support an optional opening balance.
+    application can support an optional opening balance.  Repeated calls
+    return a cached parse as long as the file's mtime is unchanged.
     """
     if not os.path.exists(DATA_FILE):
         # Initialize with some default categories. Each category includes a
         # `deleted` flag so that categories can be soft‑deleted without
         # losing the reference for existing transactions. A missing flag is
         # treated as not deleted (False) for backwards compatibility.
-        os.makedirs(DATA_DIR, exist_ok=True)
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump({
-                "categories":[
-                    {"id": str(uuid.uuid4()), "name":"Salary","type":"income", "deleted": False},
-                    # {"id": str(uuid.uuid4()), "name":"Rent","type":"expense", "deleted": False},
-                    {"id": str(uuid.uuid4()), "name":"Groceries","type":"expense", "deleted": False},
-                    # {"id": str(uuid.uuid4()), "name":"Transport","type":"expense", "deleted": False},
-                    {"id": str(uuid.uuid4()), "name":"Investments","type":"saving", "deleted": False},
-                    
-                ],
-                "transactions":[],
-                "debts":[],
-                "goals":[],
-                # An optional starting balance to carry over from before using
-                # the app.  Users can update this value via the API.
-                "open_balance": 0.0
-            }, f, ensure_ascii=False, indent=2)
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    # Ensure the open_balance key is always present
-    if "open_balance" not in data:
-        data["open_balance"] = 0.0
+        # On a fresh install every concurrent request sees the missing
+        # file, so serialize seeding under the write lock and re-check:
+        # one request creates the file, the rest fall through to read it.
+        with _WRITE_LOCK:
+            if not os.path.exists(DATA_FILE):
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _save_data(_make_default())
+    with _CACHE_LOCK:
+        st = os.stat(DATA_FILE)
+        if st.st_mtime_ns == _CACHE["mtime"]:
+            data = _CACHE["data"]
+            if "_idx" not in data:
+                _to_maps(data)
+                _build_indexes(data)
+            return data
+        with open(DATA_FILE, "rb") as f:
+            if orjson is not None and st.st_size > 0:
+                # orjson accepts buffer objects, so parse straight out of
+                # a read-only mmap (via memoryview) instead of copying the
+                # file into a bytes object first.  Only worth it on the
+                # cold path; cache hits never reach here.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = orjson.loads(memoryview(mm))
+            else:
+                data = _json_loads(f.read())
+        # Ensure the open_balance key is always present
+        if "open_balance" not in data:
+            data["open_balance"] = 0.0
+        _to_maps(data)
+        replayed = _replay_journal(data)
+        _build_indexes(data)
+        _CACHE["mtime"] = st.st_mtime_ns
+        _CACHE["data"] = data
+        _bump_version()
+    if replayed:
+        # Fold the replayed journal back into the snapshot so the next
+        # cold start begins from a clean base file.  Under the write lock:
+        # this path is reachable from read endpoints, and compacting while
+        # a mutating handler runs could fold a half-applied mutation.
+        with _WRITE_LOCK:
+            _save_data(data)
     return data
 
 def _save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    global _journal_len
+    # Serialize once and write once, then rename into place.  Encoding to a
+    # single buffer avoids the many small write() calls json.dump would
+    # issue, and the tmp+os.replace dance means a crash mid-write can never
+    # leave a truncated finance_data.json behind.  The file is written
+    # compact — it is machine-read only; /api/export pretty-prints on
+    # demand for humans.  Serializing under _CACHE_LOCK pins the journal
+    # length the buffer corresponds to: _journal appends under the same
+    # lock, so any entry not in the buffer bumps _journal_len afterwards.
+    with _CACHE_LOCK:
+        serialized_len = _journal_len
+        buf = _json_dumps(_public(data), indent=False)
+    # mkstemp gives each caller its own tmp file, so two saves racing
+    # (e.g. a cold-load compaction against a journal-compacting writer)
+    # can never unlink each other's half-written file before os.replace.
+    fd, tmp = tempfile.mkstemp(dir=DATA_DIR, prefix="finance_data.", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(buf)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, DATA_FILE)
+    with _CACHE_LOCK:
+        appended_since = _journal_len - serialized_len
+        if appended_since <= 0:
+            # Nothing was journaled after the buffer was cut, so the
+            # snapshot holds the full state and the journal is obsolete.
+            if os.path.exists(JOURNAL_FILE):
+                os.remove(JOURNAL_FILE)
+            _journal_len = 0
+        else:
+            # Entries landed between serialization and here; they are not
+            # in the snapshot, so the journal must survive.  Replaying the
+            # already-folded prefix is harmless (entries carry full
+            # records), and only the fresh suffix counts as pending.
+            _journal_len = appended_since
+        # Writers prime the cache so the next read skips the re-parse.
+        _CACHE["mtime"] = os.stat(DATA_FILE).st_mtime_ns
+        _CACHE["data"] = data
+        _bump_version()
+
+# ---------- mutation journal ----------
+def _apply_journal_entry(data, entry):
+    """Apply a single journaled mutation record to ``data`` in place."""
+    op = entry.get("op")
+    if op == "set":
+        data[entry["key"]] = entry["value"]
+    elif op == "upsert":
+        rec = entry["record"]
+        data.setdefault(entry["coll"], {})[rec["id"]] = rec
+    elif op == "delete":
+        data.get(entry["coll"], {}).pop(entry["id"], None)
+
+def _replay_journal(data):
+    """
+    Replay the sidecar journal (one JSON mutation record per line) over a
+    freshly parsed snapshot.  Returns True when the snapshot should be
+    compacted — entries were applied, or a torn tail needs clearing.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return False
+    n = 0
+    torn = False
+    with open(JOURNAL_FILE, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = _json_loads(line)
+            except Exception:
+                # A crash mid-append leaves a partial final line.  That
+                # mutation was never acknowledged to any client, so stop
+                # replaying here; the compaction we request below rewrites
+                # the snapshot from the good prefix and drops the rest.
+                torn = True
+                break
+            _apply_journal_entry(data, entry)
+            n += 1
+    return torn or n > 0
+
+def _journal(data, *entries):
+    """
+    Persist a mutation by appending one line per changed record instead of
+    rewriting the whole data file.  ``data`` (the cached dict) stays
+    authoritative in memory; the on-disk snapshot catches up when the
+    journal is compacted.
+    """
+    global _journal_len
+    with _CACHE_LOCK:
+        with open(JOURNAL_FILE, "ab") as f:
+            for e in entries:
+                f.write(_json_dumps(e, indent=False) + b"\n")
+        _journal_len += len(entries)
+        _CACHE["data"] = data
+        _bump_version()
+    if _journal_len >= _JOURNAL_COMPACT_EVERY:
+        _save_data(data)
+
+def _compact():
+    """Fold any outstanding journal entries into the snapshot file."""
+    with _CACHE_LOCK:
+        data = _CACHE["data"]
+        pending = _journal_len
+    if data is not None and pending:
+        _save_data(data)
+
+atexit.register(_compact)
 
 # ---------- name helpers ----------
+def _move_name_key(names, old_name, new_name, rec_id):
+    """
+    Keep a casefolded-name map in sync when ``rec_id`` is renamed.  Pass
+    ``new_name=None`` to just drop the record (delete / soft-delete).
+    """
+    old_key = (old_name or "").strip().casefold()
+    if names.get(old_key) == rec_id:
+        del names[old_key]
+    if new_name is not None:
+        names[new_name.strip().casefold()] = rec_id
+
 def _unique_name_excluding(data, desired, exclude_id=None):
     """Return a name unique among categories, ignoring one id (for in-place updates)."""
     base = (desired or "").strip()
-    # Only consider active (not deleted) categories when determining existing names.
-    names = { (c.get("name") or "").strip().casefold()
-              for c in data.get("categories", [])
-              if c.get("id") != exclude_id and not c.get("deleted") }
-    if base.casefold() not in names:
+    # Only active (not deleted) categories are tracked in cat_names, so a
+    # hit owned by a different id means the name is taken.
+    names = data["_idx"]["cat_names"]
+    base_cf = base.casefold()
+    owner = names.get(base_cf)
+    if owner is None or owner == exclude_id:
         return base
-    i = 2
-    while True:
-        cand = f"{base} {i}"
-        if cand.casefold() not in names:
-            return cand
-        i += 1
+    # The numeric suffix is plain ASCII, so probing with the casefolded
+    # base avoids re-casefolding each candidate.  Bound the search so a
+    # pathological pile-up of clashing names can't loop quadratically.
+    for i in range(2, 1024):
+        owner = names.get(f"{base_cf} {i}")
+        if owner is None or owner == exclude_id:
+            return f"{base} {i}"
+    return f"{base} {_new_id()[:8]}"
+
+
+# --- Payload field helpers ---
+def _s(p, key, default=""):
+    """
+    Pull a stripped string field out of a JSON payload.  Missing keys,
+    non-string values and whitespace-only strings all fall back to
+    ``default``, replacing the ``(p.get(k) or "").strip()`` dance the
+    handlers used to repeat per field.
+    """
+    v = p.get(key)
+    if isinstance(v, str):
+        v = v.strip()
+        if v:
+            return v
+    return default
+
+def _f(p, key, default=0.0):
+    """
+    Pull a numeric field out of a JSON payload as a float.  Missing or
+    falsy values fall back to ``default``; genuinely bad values raise,
+    so callers keep their existing 400 handling.
+    """
+    return float(p.get(key) or default)
 
 
 # --- Linked category helpers (ALWAYS show origin suffix) ---
@@ -99,20 +423,23 @@ def _ensure_linked_category_for_debt(data, debt):
     cat_id = debt.get("linked_category_id")
     if cat_id:
         # Update existing linked category in place, ensuring suffix & uniqueness (excluding itself).
-        for c in data.get("categories", []):
-            if c["id"] == cat_id:
-                c["type"] = ctype
-                desired = _unique_name_excluding(data, base, exclude_id=cat_id)
-                c["name"] = desired
-                return c["id"]
+        c = data["_idx"]["cat"].get(cat_id)
+        if c:
+            c["type"] = ctype
+            desired = _unique_name_excluding(data, base, exclude_id=cat_id)
+            _move_name_key(data["_idx"]["cat_names"], c.get("name"), desired, cat_id)
+            c["name"] = desired
+            return c["id"]
 
     # Always create a new linked category with a unique name. We intentionally
     # do not reuse deleted categories so that old transactions remain tied
     # to their original (now deleted) category.
     name = _unique_name_excluding(data, base, exclude_id=None)
-    new_cat = {"id": str(uuid.uuid4()), "name": name, "type": ctype, "deleted": False}
-    data.setdefault("categories", []).append(new_cat)
+    new_cat = {"id": _new_id(), "name": name, "type": ctype, "deleted": False}
+    data["categories"][new_cat["id"]] = new_cat
+    data["_idx"]["cat_names"][name.casefold()] = new_cat["id"]
     debt["linked_category_id"] = new_cat["id"]
+    data["_idx"]["debt_by_cat"][new_cat["id"]] = debt
     return new_cat["id"]
 
 def _ensure_linked_category_for_goal(data, goal):
@@ -125,20 +452,23 @@ def _ensure_linked_category_for_goal(data, goal):
 
     cat_id = goal.get("linked_category_id")
     if cat_id:
-        for c in data.get("categories", []):
-            if c["id"] == cat_id:
-                c["type"] = ctype
-                desired = _unique_name_excluding(data, base, exclude_id=cat_id)
-                c["name"] = desired
-                return c["id"]
+        c = data["_idx"]["cat"].get(cat_id)
+        if c:
+            c["type"] = ctype
+            desired = _unique_name_excluding(data, base, exclude_id=cat_id)
+            _move_name_key(data["_idx"]["cat_names"], c.get("name"), desired, cat_id)
+            c["name"] = desired
+            return c["id"]
 
     # Always create a new linked category with a unique name. We do not
     # revive deleted categories so that transactions referencing deleted
     # categories remain locked.
     name = _unique_name_excluding(data, base, exclude_id=None)
-    new_cat = {"id": str(uuid.uuid4()), "name": name, "type": ctype, "deleted": False}
-    data.setdefault("categories", []).append(new_cat)
+    new_cat = {"id": _new_id(), "name": name, "type": ctype, "deleted": False}
+    data["categories"][new_cat["id"]] = new_cat
+    data["_idx"]["cat_names"][name.casefold()] = new_cat["id"]
     goal["linked_category_id"] = new_cat["id"]
+    data["_idx"]["goal_by_cat"][new_cat["id"]] = goal
     return new_cat["id"]
 
 def _delete_linked_category(data, cat_id):
@@ -150,166 +480,271 @@ def _delete_linked_category(data, cat_id):
     """
     if not cat_id:
         return
-    for c in data.get("categories", []):
-        if c.get("id") == cat_id:
-            c["deleted"] = True
-            return
+    c = data["_idx"]["cat"].get(cat_id)
+    if c:
+        c["deleted"] = True
+        _move_name_key(data["_idx"]["cat_names"], c.get("name"), None, cat_id)
+
+# ---------- transaction effect helpers ----------
+def _debt_effect(kind, amount, debt_claim):
+    """
+    Signed change a transaction applies to a linked debt's balance.
+    A claim means we lent money: it increases a receivable and decreases
+    a payable.  A regular payment always reduces the balance.
+    """
+    amt = abs(amount)
+    if debt_claim:
+        return amt if (kind or "payable") == "receivable" else -amt
+    return -amt
+
+def _goal_effect(amount, goal_withdrawal):
+    """Withdrawals reduce a goal's current amount; deposits increase it."""
+    return -amount if goal_withdrawal else amount
+
+def _apply_txn_effect(data, cat_id, amount, debt_claim, goal_withdrawal, sign=1):
+    """
+    Apply (``sign=1``) or revert (``sign=-1``) a transaction's effect on
+    the debt/goal linked to ``cat_id``, clamping at zero.  Returns the
+    journal upsert entries for whichever records were touched, so the
+    transaction handlers share one implementation instead of repeating
+    the two lookup-and-adjust blocks.
+    """
+    entries = []
+    d = data["_idx"]["debt_by_cat"].get(cat_id)
+    if d:
+        eff = _debt_effect(d.get("kind"), amount, debt_claim)
+        d["balance"] = max(0.0, float(d.get("balance") or 0.0) + sign * eff)
+        entries.append({"op": "upsert", "coll": "debts", "record": d})
+    g = data["_idx"]["goal_by_cat"].get(cat_id)
+    if g:
+        eff = _goal_effect(amount, goal_withdrawal)
+        g["current"] = max(0.0, float(g.get("current") or 0.0) + sign * eff)
+        entries.append({"op": "upsert", "coll": "goals", "record": g})
+    return entries
 
 # ---------------------- Pages ----------------------
+@lru_cache(maxsize=8)
+def _render_page(template, title, main_class):
+    """
+    Render a static page once and reuse the HTML.  Nothing in these
+    templates depends on request-time data, so cache hits skip the Jinja
+    render entirely (the cache lives until process restart).
+    """
+    return render_template(template, title=title, main_class=main_class)
+
 @app.get("/")
 def page_root():
-    return render_template("dashboard.html", title="Koinfo", main_class="main main--dashboard")
+    return _render_page("dashboard.html", title="Koinfo", main_class="main main--dashboard")
 
 @app.get("/dashboard")
 def page_dashboard():
-    return render_template("dashboard.html", title="Koinfo-Dashboard", main_class="main main--dashboard")
+    return _render_page("dashboard.html", title="Koinfo-Dashboard", main_class="main main--dashboard")
     # return render_template("dashboard.html", title="Dashboard",  page_heading="KoinSight", main_class="main main--dashboard")
 
 @app.get("/manage")
 def page_manage():
-    return render_template("manage.html", title="Koinfo-Manage", main_class="main main--manage")
+    return _render_page("manage.html", title="Koinfo-Manage", main_class="main main--manage")
     # return render_template("manage.html", title="Manage", page_heading="KoinStudio", main_class="main main--manage")
 
 # ---------------------- API ----------------------
+# Serialized /api/data body, reused until the dataset version changes.
+_DATA_RESPONSE = {"version": None, "body": None}
+
 @app.get("/api/data")
 def api_get_data():
-    return jsonify(_load_data())
+    data = _load_data()
+    # Snapshot the version once: re-reading the global after serializing
+    # could stamp a pre-mutation body with a post-mutation version and
+    # pin stale bytes (and false 304s) in the cache until the next bump.
+    # If a mutation lands mid-handler the body may be newer than the
+    # stamp, which just means the next request re-serializes.
+    version = _data_version
+    # Weak ETag from the dataset version: pollers that already hold the
+    # current data get an empty 304 instead of the full payload.
+    etag = f'W/"{version}"'
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status=304, headers={"ETag": etag})
+    if _DATA_RESPONSE["version"] != version:
+        _DATA_RESPONSE["body"] = _json_dumps(_public(data), indent=False)
+        _DATA_RESPONSE["version"] = version
+    return Response(_DATA_RESPONSE["body"], mimetype="application/json",
+                    headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 # Categories
 @app.post("/api/category")
+@_locked
 def api_add_category():
-    p = request.get_json(force=True)
-    name = (p.get("name") or "").strip()
-    ctype = (p.get("type") or "expense").strip()
+    p = request.get_json()
+    name = _s(p, "name")
+    ctype = _s(p, "type", "expense")
     if not name:
         return jsonify({"error":"Category name required"}), 400
     data = _load_data()
-    # Only consider active (not deleted) categories when checking for duplicates
-    active_names = {c["name"].strip().casefold() for c in data.get("categories", []) if not c.get("deleted")}
-    if name.casefold() in active_names:
+    # Only active (not deleted) categories live in cat_names, so a hit here
+    # is a real duplicate.
+    name_cf = name.casefold()
+    if name_cf in data["_idx"]["cat_names"]:
         return jsonify({"error": f"Category '{name}' already exists"}), 409
     # Create a new category with a deleted flag set to False. We deliberately
     # do not revive soft‑deleted categories with the same name so that
     # transactions tied to deleted categories remain locked even if a new
     # category with the same name is created later.
-    new_cat = {"id": str(uuid.uuid4()), "name": name, "type": ctype, "deleted": False}
-    data.setdefault("categories", []).append(new_cat)
-    _save_data(data)
+    new_cat = {"id": _new_id(), "name": name, "type": ctype, "deleted": False}
+    data["categories"][new_cat["id"]] = new_cat
+    data["_idx"]["cat_names"][name_cf] = new_cat["id"]
+    _journal(data, {"op": "upsert", "coll": "categories", "record": new_cat})
     return jsonify(new_cat), 201
 
 @app.put("/api/category/<cid>")
+@_locked
 def api_update_category(cid):
-    p = request.get_json(force=True)
+    p = request.get_json()
+    # Validate cheap fields before touching the data store so malformed
+    # requests never pay for a load.
+    new_name = None
+    if "name" in p:
+        new_name = _s(p, "name")
+        if not new_name:
+            return jsonify({"error":"Category name required"}), 400
     data = _load_data()
-    for c in data.get("categories", []):
-        if c["id"] == cid:
-            if "name" in p:
-                new_name = (p.get("name") or "").strip()
-                if not new_name:
-                    return jsonify({"error":"Category name required"}), 400
-                # Only consider active categories (excluding this one) when checking for duplicates
-                active_names = {x["name"].strip().casefold() for x in data.get("categories", []) if x["id"] != cid and not x.get("deleted")}
-                if new_name.casefold() != c.get("name", "").strip().casefold() and new_name.casefold() in active_names:
-                    return jsonify({"error": f"Category '{new_name}' already exists"}), 409
-                c["name"] = new_name
-            if "type" in p:
-                c["type"] = p.get("type") or c.get("type")
-            _save_data(data)
-            return jsonify(c)
-    return jsonify({"error":"Not found"}), 404
+    c = data["_idx"]["cat"].get(cid)
+    if c is None:
+        return jsonify({"error":"Not found"}), 404
+    if new_name is not None:
+        # A cat_names hit owned by another id means an active duplicate
+        owner = data["_idx"]["cat_names"].get(new_name.casefold())
+        if owner is not None and owner != cid:
+            return jsonify({"error": f"Category '{new_name}' already exists"}), 409
+        if not c.get("deleted"):
+            _move_name_key(data["_idx"]["cat_names"], c.get("name"), new_name, cid)
+        c["name"] = new_name
+    if "type" in p:
+        c["type"] = p.get("type") or c.get("type")
+    _journal(data, {"op": "upsert", "coll": "categories", "record": c})
+    return jsonify(c)
 
 @app.delete("/api/category/<cid>")
+@_locked
 def api_delete_category(cid):
     data = _load_data()
     # prevent deleting linked categories
-    if any((d.get("linked_category_id") == cid) for d in data.get("debts", [])) or any((g.get("linked_category_id") == cid) for g in data.get("goals", [])):
+    if cid in data["_idx"]["debt_by_cat"] or cid in data["_idx"]["goal_by_cat"]:
         return jsonify({"error":"Category is linked to a Debt/Goal and cannot be deleted here"}), 409
-    # Determine if the category exists and gather transaction references
-    cat_index = None
-    for idx, c in enumerate(data.get("categories", [])):
-        if c.get("id") == cid:
-            cat_index = idx
-            break
-    if cat_index is None:
+    c = data["_idx"]["cat"].get(cid)
+    if c is None:
         return jsonify({"error":"Not found"}), 404
 
     # Count how many transactions reference this category across all time
-    txn_count = sum(1 for t in data.get("transactions", []) if t.get("category_id") == cid)
+    txn_count = len(data["_idx"]["txn_by_cat"].get(cid, ()))
 
     # If there are no transactions referencing this category and it is not linked to a debt or goal,
     # remove it entirely from the list.  Otherwise, perform a soft delete so that existing
     # transactions continue to show their original category name.
     if txn_count == 0:
         # Also ensure it's not linked to any debt or goal (should have been checked above)
-        data["categories"].pop(cat_index)
+        data["categories"].pop(cid, None)
+        _move_name_key(data["_idx"]["cat_names"], c.get("name"), None, cid)
+        _journal(data, {"op": "delete", "coll": "categories", "id": cid})
     else:
-        data["categories"][cat_index]["deleted"] = True
-    _save_data(data)
+        c["deleted"] = True
+        _move_name_key(data["_idx"]["cat_names"], c.get("name"), None, cid)
+        _journal(data, {"op": "upsert", "coll": "categories", "record": c})
     return jsonify({"ok": True})
 
 # Debts
 @app.post("/api/debt")
+@_locked
 def api_add_debt():
-    p = request.get_json(force=True)
-    data = _load_data()
-    name = (p.get("name") or "Unnamed Debt").strip()
-    kind = (p.get("kind") or "payable").strip()
-    if kind not in {"payable","receivable"}:
+    p = request.get_json()
+    # Validate the payload before touching the data store
+    name = _s(p, "name", "Unnamed Debt")
+    kind = _s(p, "kind", "payable")
+    if kind not in _DEBT_KINDS:
         kind = "payable"
-    names = {d.get("name"," ").strip().casefold() for d in data.get("debts", [])}
-    if name.casefold() in names:
+    try:
+        balance = _f(p, "balance")
+    except Exception:
+        return jsonify({"error": "Invalid balance value"}), 400
+    data = _load_data()
+    name_cf = name.casefold()
+    if name_cf in data["_idx"]["debt_names"]:
         return jsonify({"error": f"Debt '{name}' already exists"}), 409
-    d = {"id": str(uuid.uuid4()), "name": name, "balance": float(p.get("balance") or 0), "kind": kind}
-    _ensure_linked_category_for_debt(data, d)
-    data.setdefault("debts", []).append(d)
-    _save_data(data)
+    d = {"id": _new_id(), "name": name, "balance": balance, "kind": kind}
+    cat_id = _ensure_linked_category_for_debt(data, d)
+    data["debts"][d["id"]] = d
+    data["_idx"]["debt_names"][name_cf] = d["id"]
+    linked = data["_idx"]["cat"][cat_id]
+    _journal(data,
+             {"op": "upsert", "coll": "categories", "record": linked},
+             {"op": "upsert", "coll": "debts", "record": d})
     return jsonify(d), 201
 
 @app.put("/api/debt/<did>")
+@_locked
 def api_update_debt(did):
-    p = request.get_json(force=True)
+    p = request.get_json()
+    # Validate cheap fields before loading the data store
+    new_name = None
+    if "name" in p:
+        new_name = _s(p, "name")
+        if not new_name:
+            return jsonify({"error":"Debt name required"}), 400
+    new_balance = None
+    if "balance" in p:
+        try:
+            new_balance = float(p["balance"])
+        except Exception:
+            return jsonify({"error": "Invalid balance value"}), 400
     data = _load_data()
-    for d in data.get("debts", []):
-        if d["id"] == did:
-            if "name" in p:
-                new_name = (p.get("name") or "").strip()
-                if not new_name:
-                    return jsonify({"error":"Debt name required"}), 400
-                if new_name.casefold() != d.get("name"," ").strip().casefold():
-                    names = {x.get("name"," ").strip().casefold() for x in data.get("debts", []) if x["id"] != did}
-                    if new_name.casefold() in names:
-                        return jsonify({"error": f"Debt '{new_name}' already exists"}), 409
-                d["name"] = new_name
-            if "balance" in p:
-                d["balance"] = float(p["balance"])
-            if "kind" in p:
-                k = (p.get("kind") or "payable").strip()
-                if k in {"payable","receivable"}:
-                    d["kind"] = k
-            _ensure_linked_category_for_debt(data, d)
-            _save_data(data)
-            return jsonify(d)
-    return jsonify({"error":"Not found"}), 404
+    d = data["debts"].get(did)
+    if d is None:
+        return jsonify({"error":"Not found"}), 404
+    if new_name is not None:
+        owner = data["_idx"]["debt_names"].get(new_name.casefold())
+        if owner is not None and owner != did:
+            return jsonify({"error": f"Debt '{new_name}' already exists"}), 409
+        _move_name_key(data["_idx"]["debt_names"], d.get("name"), new_name, did)
+        d["name"] = new_name
+    if new_balance is not None:
+        d["balance"] = new_balance
+    if "kind" in p:
+        k = _s(p, "kind", "payable")
+        if k in _DEBT_KINDS:
+            d["kind"] = k
+    cat_id = _ensure_linked_category_for_debt(data, d)
+    linked = data["_idx"]["cat"][cat_id]
+    _journal(data,
+             {"op": "upsert", "coll": "categories", "record": linked},
+             {"op": "upsert", "coll": "debts", "record": d})
+    return jsonify(d)
 
 @app.delete("/api/debt/<did>")
+@_locked
 def api_delete_debt(did):
     data = _load_data()
-    before = len(data.get("debts", []))
-    cat_id = next((d.get("linked_category_id") for d in data.get("debts", []) if d["id"] == did), None)
-    data["debts"] = [d for d in data.get("debts", []) if d["id"] != did]
-    _delete_linked_category(data, cat_id)
-    _save_data(data)
-    if len(data.get("debts", [])) == before:
+    d = data["debts"].pop(did, None)
+    if d is None:
         return jsonify({"error":"Not found"}), 404
+    cat_id = d.get("linked_category_id")
+    _move_name_key(data["_idx"]["debt_names"], d.get("name"), None, did)
+    _delete_linked_category(data, cat_id)
+    entries = [{"op": "delete", "coll": "debts", "id": did}]
+    if cat_id:
+        data["_idx"]["debt_by_cat"].pop(cat_id, None)
+        linked = data["_idx"]["cat"].get(cat_id)
+        if linked:
+            entries.append({"op": "upsert", "coll": "categories", "record": linked})
+    _journal(data, *entries)
     return jsonify({"ok": True})
 
 # Goals
 @app.post("/api/goal")
+@_locked
 def api_add_goal():
-    p = request.get_json(force=True)
-    data = _load_data()
-    name = (p.get("name") or "New Goal").strip()
-    deadline = (p.get("deadline") or "").strip()
+    p = request.get_json()
+    # Validate the payload before touching the data store
+    name = _s(p, "name", "New Goal")
+    deadline = _s(p, "deadline")
     if not deadline:
         return jsonify({"error":"Deadline required"}), 400
     try:
@@ -318,127 +753,155 @@ def api_add_goal():
         return jsonify({"error":"Invalid deadline date"}), 400
     if dl <= date.today():
         return jsonify({"error":"Deadline must be after today"}), 400
-    names = {g.get("name"," ").strip().casefold() for g in data.get("goals", [])}
-    if name.casefold() in names:
+    try:
+        target = _f(p, "target")
+    except Exception:
+        return jsonify({"error": "Invalid target value"}), 400
+    data = _load_data()
+    name_cf = name.casefold()
+    if name_cf in data["_idx"]["goal_names"]:
         return jsonify({"error": f"Goal '{name}' already exists"}), 409
     created = date.today().isoformat()
     # New goals always start at zero progress.  The 'current' field from
     # the payload is ignored to prevent users from injecting arbitrary
     # current values.  The current progress will accumulate from
     # transactions in the linked category.
-    g = {"id": str(uuid.uuid4()), "name": name, "target": float(p.get("target") or 0), "current": 0.0, "deadline": deadline, "created": created,}
-    _ensure_linked_category_for_goal(data, g)
-    data.setdefault("goals", []).append(g)
-    _save_data(data)
+    g = {"id": _new_id(), "name": name, "target": target, "current": 0.0, "deadline": deadline, "created": created,}
+    cat_id = _ensure_linked_category_for_goal(data, g)
+    data["goals"][g["id"]] = g
+    data["_idx"]["goal_names"][name_cf] = g["id"]
+    linked = data["_idx"]["cat"][cat_id]
+    _journal(data,
+             {"op": "upsert", "coll": "categories", "record": linked},
+             {"op": "upsert", "coll": "goals", "record": g})
     return jsonify(g), 201
 
 @app.put("/api/goal/<gid>")
+@_locked
 def api_update_goal(gid):
-    p = request.get_json(force=True)
+    p = request.get_json()
+    # Validate cheap fields before loading the data store
+    new_name = None
+    if "name" in p:
+        new_name = _s(p, "name")
+        if not new_name:
+            return jsonify({"error":"Goal name required"}), 400
+    new_target = None
+    if "target" in p:
+        try:
+            new_target = float(p["target"])
+        except Exception:
+            return jsonify({"error": "Invalid target value"}), 400
+    new_deadline = None
+    if "deadline" in p:
+        new_deadline = _s(p, "deadline")
+        try:
+            dl = date.fromisoformat(new_deadline)
+        except Exception:
+            return jsonify({"error":"Invalid deadline date"}), 400
+        if dl <= date.today():
+            return jsonify({"error":"Deadline must be after today"}), 400
     data = _load_data()
-    for g in data.get("goals", []):
-        if g["id"] == gid:
-            if "name" in p:
-                new_name = (p.get("name") or "").strip()
-                if not new_name:
-                    return jsonify({"error":"Goal name required"}), 400
-                if new_name.casefold() != g.get("name"," ").strip().casefold():
-                    names = {x.get("name"," ").strip().casefold() for x in data.get("goals", []) if x["id"] != gid}
-                    if new_name.casefold() in names:
-                        return jsonify({"error": f"Goal '{new_name}' already exists"}), 409
-                g["name"] = new_name
-            if "target" in p:
-                # Always update the target if provided
-                g["target"] = float(p["target"])
-            # Intentionally ignore any 'current' value from the payload to
-            # prevent manual manipulation of progress.  The current value
-            # is updated automatically based on transactions.
-            if "deadline" in p:
-                try:
-                    dl = date.fromisoformat(p.get("deadline") or "")
-                except Exception:
-                    return jsonify({"error":"Invalid deadline date"}), 400
-                if dl <= date.today():
-                    return jsonify({"error":"Deadline must be after today"}), 400
-                g["deadline"] = p.get("deadline")
-            _ensure_linked_category_for_goal(data, g)
-            _save_data(data)
-            return jsonify(g)
-    return jsonify({"error":"Not found"}), 404
+    g = data["goals"].get(gid)
+    if g is None:
+        return jsonify({"error":"Not found"}), 404
+    if new_name is not None:
+        owner = data["_idx"]["goal_names"].get(new_name.casefold())
+        if owner is not None and owner != gid:
+            return jsonify({"error": f"Goal '{new_name}' already exists"}), 409
+        _move_name_key(data["_idx"]["goal_names"], g.get("name"), new_name, gid)
+        g["name"] = new_name
+    if new_target is not None:
+        # Always update the target if provided
+        g["target"] = new_target
+    # Intentionally ignore any 'current' value from the payload to
+    # prevent manual manipulation of progress.  The current value
+    # is updated automatically based on transactions.
+    if new_deadline is not None:
+        g["deadline"] = new_deadline
+    cat_id = _ensure_linked_category_for_goal(data, g)
+    linked = data["_idx"]["cat"][cat_id]
+    _journal(data,
+             {"op": "upsert", "coll": "categories", "record": linked},
+             {"op": "upsert", "coll": "goals", "record": g})
+    return jsonify(g)
 
 @app.delete("/api/goal/<gid>")
+@_locked
 def api_delete_goal(gid):
     data = _load_data()
-    before = len(data.get("goals", []))
-    cat_id = next((g.get("linked_category_id") for g in data.get("goals", []) if g["id"] == gid), None)
-    data["goals"] = [g for g in data.get("goals", []) if g["id"] != gid]
-    _delete_linked_category(data, cat_id)
-    _save_data(data)
-    if len(data.get("goals", [])) == before:
+    g = data["goals"].pop(gid, None)
+    if g is None:
         return jsonify({"error":"Not found"}), 404
+    cat_id = g.get("linked_category_id")
+    _move_name_key(data["_idx"]["goal_names"], g.get("name"), None, gid)
+    _delete_linked_category(data, cat_id)
+    entries = [{"op": "delete", "coll": "goals", "id": gid}]
+    if cat_id:
+        data["_idx"]["goal_by_cat"].pop(cat_id, None)
+        linked = data["_idx"]["cat"].get(cat_id)
+        if linked:
+            entries.append({"op": "upsert", "coll": "categories", "record": linked})
+    _journal(data, *entries)
     return jsonify({"ok": True})
 
 # Transactions
 @app.post("/api/transaction")
+@_locked
 def api_add_txn():
-    p = request.get_json(force=True)
+    p = request.get_json()
+    # Validate the payload before touching the data store
+    try:
+        amount = _f(p, "amount")
+    except Exception:
+        return jsonify({"error": "Invalid amount value"}), 400
     data = _load_data()
     # Respect use_open_balance flag from client; treat missing as False.
     txn = {
-        "id": str(uuid.uuid4()),
+        "id": _new_id(),
         "date": p.get("date") or date.today().isoformat(),
         "category_id": p.get("category_id"),
-        "amount": float(p.get("amount") or 0),
+        "amount": amount,
         "note": p.get("note", ""),
         # Flags for special transaction behaviors
         "use_open_balance": bool(p.get("use_open_balance")),
         "debt_claim": bool(p.get("debt_claim", False)),
         "goal_withdrawal": bool(p.get("goal_withdrawal", False)),
     }
-    c = next((c for c in data["categories"] if c["id"] == txn["category_id"]), None)
+    c = data["_idx"]["cat"].get(txn["category_id"])
     if not c:
         return jsonify({"error":"Invalid category_id"}), 400
     txn["type"] = c["type"]
     # Persist transaction immediately
-    data.setdefault("transactions", []).append(txn)
-
-    # Helper functions to compute effect on debts/goals based on flags
-    def _debt_effect(kind, amount, debt_claim):
-        amt = abs(amount)
-        if debt_claim:
-            # Claim means we lent money -> increase balance for receivable, decrease for payable
-            return amt if (kind or "payable") == "receivable" else -amt
-        else:
-            # Regular payment: always reduce balance
-            return -amt
-
-    def _goal_effect(amount, goal_withdrawal):
-        # Withdrawals reduce current; deposits increase current
-        return -amount if goal_withdrawal else amount
-
-    # Apply effects to linked debt
-    for d in data.get("debts", []):
-        if d.get("linked_category_id") == txn["category_id"]:
-            eff = _debt_effect(d.get("kind"), txn["amount"], txn.get("debt_claim", False))
-            d["balance"] = max(0.0, float(d.get("balance") or 0.0) + eff)
-            break
-    # Apply effects to linked goal
-    for g in data.get("goals", []):
-        if g.get("linked_category_id") == txn["category_id"]:
-            eff = _goal_effect(txn["amount"], txn.get("goal_withdrawal", False))
-            g["current"] = max(0.0, float(g.get("current") or 0.0) + eff)
-            break
-
-    _save_data(data)
+    data["transactions"][txn["id"]] = txn
+    data["_idx"]["txn_by_cat"].setdefault(txn["category_id"], []).append(txn)
+
+    entries = [{"op": "upsert", "coll": "transactions", "record": txn}]
+    # Apply effects to any linked debt/goal
+    entries += _apply_txn_effect(data, txn["category_id"], txn["amount"],
+                                 txn["debt_claim"], txn["goal_withdrawal"])
+
+    _journal(data, *entries)
     return jsonify(txn), 201
 
 @app.put("/api/transaction/<tid>")
+@_locked
 def api_update_txn(tid):
-    p = request.get_json(force=True)
+    p = request.get_json()
+    # Validate cheap fields before loading the data store.  Parse the
+    # amount once here and reuse it below, so the guard covers exactly
+    # the value the handler applies (None/"" fall back to 0.0, same as
+    # api_add_txn).
+    new_amt = None
+    if "amount" in p:
+        try:
+            new_amt = _f(p, "amount")
+        except Exception:
+            return jsonify({"error": "Invalid amount value"}), 400
     data = _load_data()
 
     # find existing txn
-    old = next((t for t in data.get("transactions", []) if t["id"] == tid), None)
+    old = data["_idx"]["txn"].get(tid)
     if not old:
         return jsonify({"error": "Not found"}), 404
 
@@ -451,7 +914,8 @@ def api_update_txn(tid):
     # Only allow known fields, cast amount to float
     new_date = p.get("date", old["date"])
     new_cat  = p.get("category_id", old["category_id"])
-    new_amt  = float(p.get("amount", old.get("amount") or 0.0))
+    if new_amt is None:
+        new_amt = float(old.get("amount") or 0.0)
     new_note = p.get("note", old.get("note", ""))
 
     # Determine the new value for use_open_balance.  If the client
@@ -475,46 +939,48 @@ def api_update_txn(tid):
         new_goal_withdrawal = old_goal_withdrawal
 
     # validate category
-    cat = next((c for c in data.get("categories", []) if c["id"] == new_cat), None)
+    cat = data["_idx"]["cat"].get(new_cat)
     if not cat:
         return jsonify({"error": "Invalid category_id"}), 400
 
-    # Helper functions to compute effect on debts/goals based on flags
-    def _debt_effect(kind, amount, debt_claim):
-        amt = abs(amount)
-        if debt_claim:
-            return amt if (kind or "payable") == "receivable" else -amt
-        else:
-            return -amt
-
-    def _goal_effect(amount, goal_withdrawal):
-        return -amount if goal_withdrawal else amount
-
     # ---- Adjust linked Debts / Goals by reverting old and applying new ----
-    # Revert old
-    if old_cat:
-        for d in data.get("debts", []):
-            if d.get("linked_category_id") == old_cat:
-                eff_old = _debt_effect(d.get("kind"), old_amt, old_debt_claim)
-                d["balance"] = max(0.0, float(d.get("balance") or 0.0) - eff_old)
-                break
-        for g in data.get("goals", []):
-            if g.get("linked_category_id") == old_cat:
-                eff_old_g = _goal_effect(old_amt, old_goal_withdrawal)
-                g["current"] = max(0.0, float(g.get("current") or 0.0) - eff_old_g)
-                break
-    # Apply new
-    if new_cat:
-        for d in data.get("debts", []):
-            if d.get("linked_category_id") == new_cat:
-                eff_new = _debt_effect(d.get("kind"), new_amt, new_debt_claim)
-                d["balance"] = max(0.0, float(d.get("balance") or 0.0) + eff_new)
-                break
-        for g in data.get("goals", []):
-            if g.get("linked_category_id") == new_cat:
-                eff_new_g = _goal_effect(new_amt, new_goal_withdrawal)
-                g["current"] = max(0.0, float(g.get("current") or 0.0) + eff_new_g)
-                break
+    touched = []
+    if old_cat == new_cat:
+        # Common case: the category is unchanged (amount/flag edit), so
+        # fold revert-old + apply-new into one net delta per entity.
+        d = data["_idx"]["debt_by_cat"].get(new_cat)
+        if d:
+            delta = (_debt_effect(d.get("kind"), new_amt, new_debt_claim)
+                     - _debt_effect(d.get("kind"), old_amt, old_debt_claim))
+            d["balance"] = max(0.0, float(d.get("balance") or 0.0) + delta)
+            touched.append({"op": "upsert", "coll": "debts", "record": d})
+        g = data["_idx"]["goal_by_cat"].get(new_cat)
+        if g:
+            delta_g = (_goal_effect(new_amt, new_goal_withdrawal)
+                       - _goal_effect(old_amt, old_goal_withdrawal))
+            g["current"] = max(0.0, float(g.get("current") or 0.0) + delta_g)
+            touched.append({"op": "upsert", "coll": "goals", "record": g})
+    else:
+        # Revert old, then apply new
+        if old_cat:
+            touched += _apply_txn_effect(data, old_cat, old_amt,
+                                         old_debt_claim, old_goal_withdrawal, sign=-1)
+        if new_cat:
+            touched += _apply_txn_effect(data, new_cat, new_amt,
+                                         new_debt_claim, new_goal_withdrawal)
+
+    # Keep the per-category txn index in step with the move
+    if old_cat != new_cat:
+        by_cat = data["_idx"]["txn_by_cat"]
+        old_list = by_cat.get(old_cat)
+        if old_list is not None:
+            try:
+                old_list.remove(old)
+            except ValueError:
+                pass
+            if not old_list:
+                by_cat.pop(old_cat, None)
+        by_cat.setdefault(new_cat, []).append(old)
 
     # update txn record
     old.update({
@@ -528,14 +994,15 @@ def api_update_txn(tid):
         "goal_withdrawal": new_goal_withdrawal
     })
 
-    _save_data(data)
+    _journal(data, {"op": "upsert", "coll": "transactions", "record": old}, *touched)
     return jsonify(old)
 
 @app.delete("/api/transaction/<tid>")
+@_locked
 def api_delete_txn(tid):
     data = _load_data()
     # Find the txn first
-    txn = next((t for t in data.get("transactions", []) if t["id"] == tid), None)
+    txn = data["_idx"]["txn"].get(tid)
     if not txn:
         return jsonify({"error": "Not found"}), 404
 
@@ -544,36 +1011,27 @@ def api_delete_txn(tid):
     debt_claim = bool(txn.get("debt_claim", False))
     goal_withdrawal = bool(txn.get("goal_withdrawal", False))
 
-    # Helper functions
-    def _debt_effect(kind, amount, debt_claim):
-        a = abs(amount)
-        if debt_claim:
-            return a if (kind or "payable") == "receivable" else -a
-        else:
-            return -a
-
-    def _goal_effect(amount, goal_withdrawal):
-        return -amount if goal_withdrawal else amount
-
     # Roll back effects on Debt and Goal: subtract the effect we previously applied
-    for d in data.get("debts", []):
-        if d.get("linked_category_id") == cat_id:
-            eff = _debt_effect(d.get("kind"), amt, debt_claim)
-            d["balance"] = max(0.0, float(d.get("balance") or 0.0) - eff)
-            break
-    for g in data.get("goals", []):
-        if g.get("linked_category_id") == cat_id:
-            effg = _goal_effect(amt, goal_withdrawal)
-            g["current"] = max(0.0, float(g.get("current") or 0.0) - effg)
-            break
+    entries = [{"op": "delete", "coll": "transactions", "id": tid}]
+    entries += _apply_txn_effect(data, cat_id, amt, debt_claim, goal_withdrawal, sign=-1)
 
     # Remove the transaction
-    data["transactions"] = [t for t in data.get("transactions", []) if t["id"] != tid]
-    _save_data(data)
+    data["transactions"].pop(tid, None)
+    by_cat = data["_idx"]["txn_by_cat"]
+    cat_list = by_cat.get(cat_id)
+    if cat_list is not None:
+        try:
+            cat_list.remove(txn)
+        except ValueError:
+            pass
+        if not cat_list:
+            by_cat.pop(cat_id, None)
+    _journal(data, *entries)
     return jsonify({"ok": True})
 
 # ---------------------- Opening Balance ----------------------
 @app.put("/api/open_balance")
+@_locked
 def api_update_open_balance():
     """
     Update the global opening balance.  This value represents money
@@ -582,28 +1040,58 @@ def api_update_open_balance():
     ``open_balance`` numeric field.  Returns the updated value on
     success.
     """
-    p = request.get_json(force=True)
+    p = request.get_json()
     try:
         new_val = float(p.get("open_balance", 0))
     except Exception:
         return jsonify({"error": "Invalid open_balance value"}), 400
     data = _load_data()
     data["open_balance"] = new_val
-    _save_data(data)
+    _journal(data, {"op": "set", "key": "open_balance", "value": new_val})
     return jsonify({"open_balance": new_val})
 
 
+# ---------------------- Export ----------------------
+# Pretty-printed export body, reused until the dataset version changes
+# (same scheme as _DATA_RESPONSE above).
+_EXPORT_RESPONSE = {"version": None, "body": None}
+
+@app.get("/api/export")
+def api_export():
+    """
+    Download the dataset as indented JSON.  The on-disk file is stored
+    compact for write speed, so pretty-printing happens only here, and
+    repeat downloads of unchanged data reuse the serialized bytes.
+    """
+    data = _load_data()
+    # Single version read, same reasoning as api_get_data: stamping a
+    # re-read of the global could pin a pre-mutation body under a
+    # post-mutation version.
+    version = _data_version
+    if _EXPORT_RESPONSE["version"] != version:
+        _EXPORT_RESPONSE["body"] = _json_dumps(_public(data))
+        _EXPORT_RESPONSE["version"] = version
+    return Response(_EXPORT_RESPONSE["body"], mimetype="application/json",
+                    headers={"Content-Disposition": "attachment; filename=finance_data.json"})
+
+
 # Reset all data back to the default dataset.  This endpoint overwrites
-# the finance_data.json file with DEFAULT_DATA and returns the new
-# contents.  A POST method is required to avoid accidental resets via
-# GET requests.  Clients should confirm with the user before
+# the finance_data.json file with a fresh default dataset and returns
+# the new contents.  A POST method is required to avoid accidental
+# resets via GET requests.  Clients should confirm with the user before
 # invoking this endpoint.
 @app.post("/api/reset_data")
+@_locked
 def api_reset_data():
-    # Deep copy the default data to avoid modifying the constant
-    fresh = deepcopy(DEFAULT_DATA)
+    fresh = _make_default()
+    # Convert to the in-memory shape before priming the cache via
+    # _save_data: a concurrent cache-hit load would otherwise run
+    # _to_maps/_build_indexes on this same dict while we serialize it,
+    # leaking id-keyed objects and _idx into the response.
+    _to_maps(fresh)
+    _build_indexes(fresh)
     _save_data(fresh)
-    return jsonify(fresh)
+    return jsonify(_public(fresh))
 
 import webbrowser
 from threading import Timer
@@ -614,5 +1102,11 @@ def open_browser():
 if __name__ == "__main__":
     # open the browser 1 second after the server starts
     Timer(1, open_browser).start()
-    app.run(host="127.0.0.1", port=2901, debug=False)
+    try:
+        from waitress import serve
+    except ImportError:
+        # Fall back to the Flask development server if waitress is missing.
+        app.run(host="127.0.0.1", port=2901, debug=False)
+    else:
+        serve(app, host="127.0.0.1", port=2901, threads=8)
 